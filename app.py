@@ -1,12 +1,17 @@
 import streamlit as st
 import os
+import uuid
 import database as db
+import maintenance
+from artifact_store import artifact_store
 from ui_functions import show_login_page, show_register_page, show_main_app_page, show_history_page, show_about_app_page
 
 st.set_page_config(layout="wide", page_title="Deteksi Penyakit Daun Melon")
 
+@st.cache_resource
 def initialize_app():
     db.init_db()
+    return maintenance.start_maintenance_worker()
 
 initialize_app()
 
@@ -17,14 +22,17 @@ if 'page' not in st.session_state:
 if 'username' not in st.session_state:
     st.session_state.username = None
 
-if 'uploaded_image_data' not in st.session_state:
-    st.session_state.uploaded_image_data = None
+if 'artifact_session_id' not in st.session_state:
+    st.session_state.artifact_session_id = uuid.uuid4().hex
+
+if 'uploaded_image_handle' not in st.session_state:
+    st.session_state.uploaded_image_handle = None
 if 'uploaded_file_hash' not in st.session_state:
     st.session_state.uploaded_file_hash = None
 if 'uploaded_file_name' not in st.session_state:
     st.session_state.uploaded_file_name = None
-if 'processed_image_for_display_upload' not in st.session_state:
-    st.session_state.processed_image_for_display_upload = None
+if 'processed_image_handle' not in st.session_state:
+    st.session_state.processed_image_handle = None
 if 'detection_results_summary_upload' not in st.session_state:
     st.session_state.detection_results_summary_upload = "Tidak ada deteksi."
 if 'detection_highest_confidence_upload' not in st.session_state:
@@ -54,9 +62,10 @@ else:
         st.session_state.logged_in = False
         st.session_state.page = "login"
         st.session_state.username = None
-        st.session_state.uploaded_image_data = None
+        artifact_store.release_session(st.session_state.artifact_session_id)
+        st.session_state.uploaded_image_handle = None
         st.session_state.uploaded_file_hash = None
-        st.session_state.processed_image_for_display_upload = None
+        st.session_state.processed_image_handle = None
         st.session_state.detection_results_summary_upload = "Tidak ada deteksi."
         st.session_state.detection_highest_confidence_upload = 0.0
         st.session_state.last_upload_conf_slider_value = 0.50
@@ -68,6 +77,14 @@ else:
         st.session_state.current_detection_info = {"diseases": [], "avg_confidence": 0.0, "keterangan": "Menunggu aktivasi webcam."}
         st.rerun()
 
+    session_usage = artifact_store.session_memory_usage(st.session_state.artifact_session_id)
+    total_usage = artifact_store.memory_usage()
+    st.sidebar.caption(
+        f"Memori sesi: {session_usage['resident_bytes'] / (1024 * 1024):.1f} MB "
+        f"(disk: {session_usage['spilled_bytes'] / (1024 * 1024):.1f} MB) | "
+        f"Total: {total_usage['resident_bytes'] / (1024 * 1024):.1f} / {total_usage['budget_bytes'] / (1024 * 1024):.0f} MB"
+    )
+
     st.sidebar.markdown("---")
     st.sidebar.title("Menu Aplikasi")
 
@@ -0,0 +1,218 @@
+import atexit
+import glob
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+
+MEMORY_BUDGET_BYTES = int(os.environ.get("ARTIFACT_MEMORY_BUDGET_MB", "256")) * 1024 * 1024
+STALE_ARTIFACT_SECONDS = 24 * 60 * 60
+SPILL_DIR_PREFIX = "melon_artifacts_"
+
+def _sizeof(value) -> int:
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    return len(value)
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def _remove_orphaned_spill_dirs():
+    if os.name != "posix":
+        return
+    for spill_dir in glob.glob(os.path.join(tempfile.gettempdir(), f"{SPILL_DIR_PREFIX}*_*")):
+        pid_part = os.path.basename(spill_dir)[len(SPILL_DIR_PREFIX):].split("_", 1)[0]
+        if pid_part.isdigit() and not _process_alive(int(pid_part)):
+            shutil.rmtree(spill_dir, ignore_errors=True)
+
+class ArtifactStore:
+
+    def __init__(self, memory_budget_bytes: int = MEMORY_BUDGET_BYTES, spill_dir: str = None):
+        self.memory_budget_bytes = memory_budget_bytes
+        if spill_dir is None:
+            _remove_orphaned_spill_dirs()
+            spill_dir = tempfile.mkdtemp(prefix=f"{SPILL_DIR_PREFIX}{os.getpid()}_")
+            atexit.register(shutil.rmtree, spill_dir, True)
+        self.spill_dir = spill_dir
+        os.makedirs(self.spill_dir, exist_ok=True)
+        self._entries = OrderedDict()
+        self._resident_bytes = 0
+        self._lock = threading.Lock()
+
+    def _spill_path(self, handle: str, entry: dict) -> str:
+        extension = ".npy" if entry['kind'] == "ndarray" else ".bin"
+        return os.path.join(self.spill_dir, f"{handle}{extension}")
+
+    def _write_to_disk(self, path: str, kind: str, value):
+        if kind == "ndarray":
+            np.save(path, value, allow_pickle=False)
+        else:
+            with open(path, "wb") as f:
+                f.write(value)
+
+    def _read_from_disk(self, path: str, kind: str):
+        if kind == "ndarray":
+            return np.load(path, allow_pickle=False)
+        with open(path, "rb") as f:
+            return f.read()
+
+    def _select_victims(self) -> list:
+        victims = []
+        for handle, entry in self._entries.items():
+            if self._resident_bytes <= self.memory_budget_bytes:
+                break
+            if entry['value'] is None or entry['spilling']:
+                continue
+            entry['spilling'] = True
+            self._resident_bytes -= entry['size']
+            victims.append((handle, entry))
+        return victims
+
+    def _spill(self, victims: list):
+        for handle, entry in victims:
+            path = entry['path'] or self._spill_path(handle, entry)
+            try:
+                if entry['path'] is None:
+                    self._write_to_disk(path, entry['kind'], entry['value'])
+            except OSError as e:
+                print(f"Gagal menulis artefak {handle} ke cache disk: {e}")
+                with self._lock:
+                    entry['spilling'] = False
+                    if handle in self._entries:
+                        self._resident_bytes += entry['size']
+                continue
+
+            with self._lock:
+                entry['spilling'] = False
+                if handle in self._entries:
+                    entry['path'] = path
+                    entry['value'] = None
+                    continue
+            _remove_file(path)
+
+    def _remove(self, handle: str):
+        entry = self._entries.pop(handle, None)
+        if entry is None:
+            return
+        if entry['value'] is not None and not entry['spilling']:
+            self._resident_bytes -= entry['size']
+        if entry['path']:
+            _remove_file(entry['path'])
+
+    def put(self, session_id: str, value) -> str:
+        handle = uuid.uuid4().hex
+        entry = {
+            "session_id": session_id,
+            "kind": "ndarray" if isinstance(value, np.ndarray) else "bytes",
+            "size": _sizeof(value),
+            "value": value,
+            "path": None,
+            "spilling": False,
+            "last_access": time.time(),
+        }
+
+        if entry['size'] > self.memory_budget_bytes:
+            path = self._spill_path(handle, entry)
+            try:
+                self._write_to_disk(path, entry['kind'], value)
+                entry['path'] = path
+                entry['value'] = None
+            except OSError as e:
+                print(f"Gagal menulis artefak {handle} ke cache disk, disimpan di memori: {e}")
+                _remove_file(path)
+            with self._lock:
+                self._entries[handle] = entry
+                if entry['value'] is not None:
+                    self._resident_bytes += entry['size']
+            return handle
+
+        with self._lock:
+            self._entries[handle] = entry
+            self._resident_bytes += entry['size']
+            victims = self._select_victims()
+        self._spill(victims)
+        return handle
+
+    def get(self, handle: str):
+        with self._lock:
+            entry = self._entries.get(handle)
+            if entry is None:
+                return None
+            entry['last_access'] = time.time()
+            self._entries.move_to_end(handle)
+            if entry['value'] is not None:
+                return entry['value']
+            path, kind = entry['path'], entry['kind']
+
+        try:
+            value = self._read_from_disk(path, kind)
+        except OSError as e:
+            print(f"Gagal memuat artefak {handle} dari cache disk: {e}")
+            self.release(handle)
+            return None
+
+        if entry['size'] > self.memory_budget_bytes:
+            return value
+
+        with self._lock:
+            if handle not in self._entries or entry['value'] is not None:
+                return entry['value'] if entry['value'] is not None else value
+            entry['value'] = value
+            self._resident_bytes += entry['size']
+            victims = self._select_victims()
+        self._spill(victims)
+        return value
+
+    def release(self, handle: str):
+        with self._lock:
+            self._remove(handle)
+
+    def release_session(self, session_id: str):
+        with self._lock:
+            for handle in [h for h, entry in self._entries.items() if entry['session_id'] == session_id]:
+                self._remove(handle)
+
+    def purge_stale(self, max_idle_seconds: int = STALE_ARTIFACT_SECONDS) -> int:
+        cutoff = time.time() - max_idle_seconds
+        with self._lock:
+            stale_handles = [h for h, entry in self._entries.items() if entry['last_access'] < cutoff]
+            for handle in stale_handles:
+                self._remove(handle)
+        return len(stale_handles)
+
+    def memory_usage(self) -> dict:
+        with self._lock:
+            per_session = {}
+            for entry in self._entries.values():
+                usage = per_session.setdefault(entry['session_id'], {"resident_bytes": 0, "spilled_bytes": 0})
+                if entry['value'] is not None:
+                    usage['resident_bytes'] += entry['size']
+                else:
+                    usage['spilled_bytes'] += entry['size']
+            return {
+                "resident_bytes": self._resident_bytes,
+                "budget_bytes": self.memory_budget_bytes,
+                "sessions": per_session,
+            }
+
+    def session_memory_usage(self, session_id: str) -> dict:
+        return self.memory_usage()['sessions'].get(session_id, {"resident_bytes": 0, "spilled_bytes": 0})
+
+artifact_store = ArtifactStore()
@@ -1,16 +1,21 @@
 import sqlite3
 import hashlib
-from datetime import datetime
+from datetime import datetime, timedelta
 import pytz 
 import os 
 
 DATABASE_FILE = "users.db"
+EXPORT_BATCH_SIZE = 50
 
 def _get_db_connection():
-    conn = sqlite3.connect(DATABASE_FILE)
+    conn = sqlite3.connect(DATABASE_FILE, timeout=30)
     conn.row_factory = sqlite3.Row 
     return conn
 
+def _current_jakarta_time() -> datetime:
+    jakarta_tz = pytz.timezone('Asia/Jakarta')
+    return datetime.utcnow().replace(tzinfo=pytz.utc).astimezone(jakarta_tz)
+
 def init_db():
     with _get_db_connection() as conn: 
         c = conn.cursor()
@@ -34,6 +39,20 @@ def init_db():
                 FOREIGN KEY (username) REFERENCES users (username) ON DELETE CASCADE
             )
         ''')
+
+        c.execute('''
+            CREATE INDEX IF NOT EXISTS idx_detection_history_username_timestamp
+            ON detection_history (username, timestamp)
+        ''')
+
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS retention_policy (
+                username TEXT PRIMARY KEY,
+                max_age_days INTEGER,
+                max_records INTEGER,
+                FOREIGN KEY (username) REFERENCES users (username) ON DELETE CASCADE
+            )
+        ''')
         conn.commit()
 
 def hash_password(password: str) -> str:
@@ -71,10 +90,7 @@ def add_detection_record(username: str, disease_name: str, confidence: float, im
     with _get_db_connection() as conn:
         c = conn.cursor()
         try:
-            jakarta_tz = pytz.timezone('Asia/Jakarta')
-            current_utc_time = datetime.utcnow()
-            current_jakarta_time = current_utc_time.replace(tzinfo=pytz.utc).astimezone(jakarta_tz)
-            timestamp_str = current_jakarta_time.strftime("%Y-%m-%d %H:%M:%S") 
+            timestamp_str = _current_jakarta_time().strftime("%Y-%m-%d %H:%M:%S") 
 
             c.execute("INSERT INTO detection_history (username, timestamp, disease_name, confidence, image_path) VALUES (?, ?, ?, ?, ?)",
                       (username, timestamp_str, disease_name, confidence, image_path))
@@ -96,14 +112,141 @@ def get_detection_history(username: str) -> list:
             print(f"Error mengambil riwayat deteksi: {e}")
             return []
 
-def delete_detection_record(record_id: int) -> bool:
-    with _get_db_connection() as conn: 
+def _history_range_filter(username: str, start_date: str = None, end_date: str = None) -> tuple[str, list]:
+    where = "username = ?"
+    params = [username]
+    if start_date:
+        where += " AND timestamp >= ?"
+        params.append(f"{start_date} 00:00:00")
+    if end_date:
+        where += " AND timestamp <= ?"
+        params.append(f"{end_date} 23:59:59")
+    return where, params
+
+def count_detection_history(username: str, start_date: str = None, end_date: str = None) -> int:
+    where, params = _history_range_filter(username, start_date, end_date)
+    with _get_db_connection() as conn:
+        c = conn.cursor()
+        try:
+            c.execute(f"SELECT COUNT(*) FROM detection_history WHERE {where}", params)
+            return c.fetchone()[0]
+        except Exception as e:
+            print(f"Error menghitung riwayat deteksi: {e}")
+            return 0
+
+def iter_detection_history(username: str, start_date: str = None, end_date: str = None,
+                           include_images: bool = True, batch_size: int = EXPORT_BATCH_SIZE):
+    columns = "id, timestamp, disease_name, confidence, image_path" if include_images else "id, timestamp, disease_name, confidence"
+    where, params = _history_range_filter(username, start_date, end_date)
+    query = f"SELECT {columns} FROM detection_history WHERE {where} ORDER BY timestamp DESC"
+
+    conn = _get_db_connection()
+    try:
+        c = conn.cursor()
+        c.execute(query, params)
+        while True:
+            rows = c.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield dict(row)
+    finally:
+        conn.close()
+
+def delete_detection_records(username: str, record_ids: list) -> int:
+    if not record_ids:
+        return 0
+    with _get_db_connection() as conn:
+        c = conn.cursor()
+        try:
+            c.executemany("DELETE FROM detection_history WHERE id = ? AND username = ?",
+                          [(record_id, username) for record_id in record_ids])
+            conn.commit()
+            deleted_count = c.rowcount
+            print(f"{deleted_count} catatan deteksi milik '{username}' berhasil dihapus.")
+            return deleted_count
+        except Exception as e:
+            conn.rollback()
+            print(f"Error menghapus catatan deteksi secara massal: {e}")
+            return -1
+
+def get_retention_policy(username: str) -> dict:
+    with _get_db_connection() as conn:
+        c = conn.cursor()
+        c.execute("SELECT max_age_days, max_records FROM retention_policy WHERE username = ?", (username,))
+        result = c.fetchone()
+    if result:
+        return dict(result)
+    return {"max_age_days": None, "max_records": None}
+
+def set_retention_policy(username: str, max_age_days: int = None, max_records: int = None) -> bool:
+    with _get_db_connection() as conn:
         c = conn.cursor()
         try:
-            c.execute("DELETE FROM detection_history WHERE id = ?", (record_id,))
+            c.execute("INSERT INTO retention_policy (username, max_age_days, max_records) VALUES (?, ?, ?) "
+                      "ON CONFLICT(username) DO UPDATE SET max_age_days = excluded.max_age_days, max_records = excluded.max_records",
+                      (username, max_age_days or None, max_records or None))
             conn.commit()
-            print(f"Catatan deteksi dengan ID {record_id} berhasil dihapus.")
+            print(f"Kebijakan retensi '{username}' disimpan (maks. umur: {max_age_days} hari, maks. catatan: {max_records}).")
             return True
         except Exception as e:
-            print(f"Error menghapus catatan deteksi: {e}")
+            print(f"Error menyimpan kebijakan retensi: {e}")
             return False
+
+def purge_expired_records() -> int:
+    with _get_db_connection() as conn:
+        c = conn.cursor()
+        c.execute("SELECT username, max_age_days, max_records FROM retention_policy "
+                  "WHERE max_age_days IS NOT NULL OR max_records IS NOT NULL")
+        policies = [dict(row) for row in c.fetchall()]
+
+    total_purged = 0
+    for policy in policies:
+        with _get_db_connection() as conn:
+            c = conn.cursor()
+            try:
+                if policy['max_age_days']:
+                    cutoff = _current_jakarta_time() - timedelta(days=policy['max_age_days'])
+                    c.execute("DELETE FROM detection_history WHERE username = ? AND timestamp < ?",
+                              (policy['username'], cutoff.strftime("%Y-%m-%d %H:%M:%S")))
+                    total_purged += c.rowcount
+                if policy['max_records']:
+                    c.execute("DELETE FROM detection_history WHERE username = ? AND id NOT IN ("
+                              "SELECT id FROM detection_history WHERE username = ? ORDER BY timestamp DESC, id DESC LIMIT ?)",
+                              (policy['username'], policy['username'], policy['max_records']))
+                    total_purged += c.rowcount
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                print(f"Error menerapkan kebijakan retensi untuk '{policy['username']}': {e}")
+    return total_purged
+
+def enable_incremental_vacuum() -> bool:
+    with _get_db_connection() as conn:
+        c = conn.cursor()
+        try:
+            if c.execute("PRAGMA journal_mode").fetchone()[0] != "wal":
+                c.execute("PRAGMA journal_mode = WAL")
+            if c.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                c.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                c.execute("VACUUM")
+                print("Database dikonversi ke mode auto_vacuum INCREMENTAL.")
+            return True
+        except sqlite3.OperationalError as e:
+            print(f"Konversi mode vacuum database ditunda: {e}")
+            return False
+
+def incremental_vacuum(max_pages: int) -> int:
+    with _get_db_connection() as conn:
+        c = conn.cursor()
+        page_size = c.execute("PRAGMA page_size").fetchone()[0]
+        freelist_before = c.execute("PRAGMA freelist_count").fetchone()[0]
+        if freelist_before == 0:
+            return 0
+        conn.executescript(f"PRAGMA incremental_vacuum({int(max_pages)});")
+        freelist_after = c.execute("PRAGMA freelist_count").fetchone()[0]
+    return (freelist_before - freelist_after) * page_size
+
+def get_freelist_pages() -> int:
+    with _get_db_connection() as conn:
+        return conn.execute("PRAGMA freelist_count").fetchone()[0]
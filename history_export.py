@@ -0,0 +1,110 @@
+import base64
+import binascii
+import csv
+import io
+import os
+import shutil
+import tempfile
+import time
+import uuid
+import zipfile
+
+import database as db
+
+CSV_HEADER = ["id", "timestamp", "disease_name", "confidence"]
+ZIP_CSV_HEADER = CSV_HEADER + ["image_file"]
+
+EXPORT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "exports")
+EXPORT_URL_PATH = "app/static/exports"
+EXPORT_TTL_SECONDS = 10 * 60
+# Batas ukuran file yang mau dilayani AppStaticFileHandler Streamlit.
+MAX_EXPORT_FILE_SIZE = 200 * 1024 * 1024
+
+def write_history_csv(username: str, fileobj, start_date: str = None, end_date: str = None) -> int:
+    text_stream = io.TextIOWrapper(fileobj, encoding="utf-8", newline="", write_through=True)
+    writer = csv.writer(text_stream)
+    writer.writerow(CSV_HEADER)
+
+    count = 0
+    for record in db.iter_detection_history(username, start_date, end_date, include_images=False):
+        writer.writerow([record['id'], record['timestamp'], record['disease_name'], f"{record['confidence']:.4f}"])
+        count += 1
+
+    text_stream.flush()
+    text_stream.detach()
+    return count
+
+def write_history_zip(username: str, fileobj, start_date: str = None, end_date: str = None) -> int:
+    count = 0
+    with tempfile.TemporaryFile() as csv_buffer, \
+         zipfile.ZipFile(fileobj, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
+        text_stream = io.TextIOWrapper(csv_buffer, encoding="utf-8", newline="", write_through=True)
+        writer = csv.writer(text_stream)
+        writer.writerow(ZIP_CSV_HEADER)
+
+        for record in db.iter_detection_history(username, start_date, end_date, include_images=True):
+            image_file = ""
+            if record['image_path']:
+                try:
+                    image_bytes = base64.b64decode(record['image_path'], validate=True)
+                    image_file = f"images/{record['id']}.png"
+                    zf.writestr(image_file, image_bytes, compress_type=zipfile.ZIP_STORED)
+                except (binascii.Error, ValueError) as e:
+                    print(f"Gambar pada catatan ID {record['id']} tidak valid dan dilewati: {e}")
+            writer.writerow([record['id'], record['timestamp'], record['disease_name'], f"{record['confidence']:.4f}", image_file])
+            count += 1
+
+        text_stream.flush()
+        text_stream.detach()
+        csv_buffer.seek(0)
+        with zf.open("history.csv", mode="w") as zipped_csv:
+            while True:
+                chunk = csv_buffer.read(64 * 1024)
+                if not chunk:
+                    break
+                zipped_csv.write(chunk)
+
+    return count
+
+def build_history_export(username: str, export_format: str, start_date: str = None, end_date: str = None) -> str | None:
+    purge_expired_exports()
+    export_dir = os.path.join(EXPORT_DIR, uuid.uuid4().hex)
+    os.makedirs(export_dir)
+    export_path = os.path.join(export_dir, f"riwayat_deteksi.{export_format}")
+
+    try:
+        with open(export_path, "w+b") as export_file:
+            if export_format == "zip":
+                write_history_zip(username, export_file, start_date, end_date)
+            else:
+                write_history_csv(username, export_file, start_date, end_date)
+    except Exception as e:
+        print(f"Error membuat file ekspor riwayat: {e}")
+        remove_history_export(export_path)
+        return None
+
+    if os.path.getsize(export_path) > MAX_EXPORT_FILE_SIZE:
+        print(f"File ekspor riwayat '{username}' melebihi {MAX_EXPORT_FILE_SIZE} byte dan dibuang.")
+        remove_history_export(export_path)
+        return None
+    return export_path
+
+def history_export_url(export_path: str) -> str:
+    relative_path = os.path.relpath(export_path, EXPORT_DIR).replace(os.sep, "/")
+    return f"{EXPORT_URL_PATH}/{relative_path}"
+
+def remove_history_export(export_path: str):
+    export_dir = os.path.dirname(export_path)
+    if os.path.dirname(export_dir) == EXPORT_DIR:
+        shutil.rmtree(export_dir, ignore_errors=True)
+
+def purge_expired_exports(max_age_seconds: int = EXPORT_TTL_SECONDS) -> int:
+    if not os.path.isdir(EXPORT_DIR):
+        return 0
+    cutoff = time.time() - max_age_seconds
+    purged = 0
+    for entry in os.scandir(EXPORT_DIR):
+        if entry.is_dir() and entry.stat().st_mtime < cutoff:
+            shutil.rmtree(entry.path, ignore_errors=True)
+            purged += 1
+    return purged
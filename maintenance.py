@@ -0,0 +1,66 @@
+import threading
+import time
+
+import database as db
+import history_export
+from artifact_store import artifact_store
+
+MAINTENANCE_INTERVAL_SECONDS = 60 * 60
+VACUUM_PAGES_PER_STEP = 256
+VACUUM_STEP_PAUSE_SECONDS = 0.05
+
+_last_report = None
+_report_lock = threading.Lock()
+_run_requested = threading.Event()
+
+def run_maintenance() -> dict:
+    global _last_report
+    started_at = time.time()
+    purged_records = db.purge_expired_records()
+    purged_artifacts = artifact_store.purge_stale()
+    purged_exports = history_export.purge_expired_exports()
+
+    bytes_reclaimed = 0
+    while db.get_freelist_pages() > 0:
+        reclaimed = db.incremental_vacuum(VACUUM_PAGES_PER_STEP)
+        if reclaimed <= 0:
+            break
+        bytes_reclaimed += reclaimed
+        time.sleep(VACUUM_STEP_PAUSE_SECONDS)
+
+    report = {
+        "finished_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "purged_records": purged_records,
+        "purged_artifacts": purged_artifacts,
+        "purged_exports": purged_exports,
+        "bytes_reclaimed": bytes_reclaimed,
+        "duration_seconds": time.time() - started_at,
+    }
+    with _report_lock:
+        _last_report = report
+    print(f"Pemeliharaan database selesai: {purged_records} catatan kedaluwarsa dihapus, {bytes_reclaimed} byte dikosongkan, {purged_artifacts} artefak sesi dan {purged_exports} file ekspor kedaluwarsa dibuang.")
+    return report
+
+def get_last_report() -> dict | None:
+    with _report_lock:
+        return dict(_last_report) if _last_report else None
+
+def request_maintenance_run():
+    _run_requested.set()
+
+def _maintenance_loop():
+    incremental_vacuum_enabled = False
+    while True:
+        _run_requested.clear()
+        try:
+            if not incremental_vacuum_enabled:
+                incremental_vacuum_enabled = db.enable_incremental_vacuum()
+            run_maintenance()
+        except Exception as e:
+            print(f"Error menjalankan pemeliharaan database: {e}")
+        _run_requested.wait(MAINTENANCE_INTERVAL_SECONDS)
+
+def start_maintenance_worker() -> threading.Thread:
+    worker = threading.Thread(target=_maintenance_loop, name="db-maintenance", daemon=True)
+    worker.start()
+    return worker
@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database as db
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DATABASE_FILE", str(tmp_path / "users.db"))
+    db.init_db()
+    db.add_user("petani", "rahasia")
+    db.add_user("agronom", "rahasia")
+    return db
+
+def insert_record(username: str, timestamp: str, disease_name: str = "downy mildew",
+                  confidence: float = 0.9, image_path: str = None) -> int:
+    with db._get_db_connection() as conn:
+        c = conn.cursor()
+        c.execute("INSERT INTO detection_history (username, timestamp, disease_name, confidence, image_path) VALUES (?, ?, ?, ?, ?)",
+                  (username, timestamp, disease_name, confidence, image_path))
+        conn.commit()
+        return c.lastrowid
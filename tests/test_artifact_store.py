@@ -0,0 +1,80 @@
+import os
+
+import numpy as np
+import pytest
+
+from artifact_store import ArtifactStore
+
+@pytest.fixture
+def store(tmp_path):
+    return ArtifactStore(memory_budget_bytes=1000, spill_dir=str(tmp_path))
+
+def test_put_and_get_keep_values_resident_within_budget(store):
+    handle = store.put("sesi-a", b"a" * 400)
+
+    assert store.get(handle) == b"a" * 400
+    assert store.session_memory_usage("sesi-a") == {"resident_bytes": 400, "spilled_bytes": 0}
+    assert os.listdir(store.spill_dir) == []
+
+def test_least_recently_used_artifact_is_spilled_and_reloaded(store):
+    first = store.put("sesi-a", b"a" * 400)
+    second = store.put("sesi-b", np.full((20, 20), 7, dtype=np.uint8))
+    store.get(first)
+
+    third = store.put("sesi-b", b"c" * 400)
+
+    usage = store.memory_usage()
+    assert usage['resident_bytes'] == 800
+    assert usage['sessions']['sesi-b'] == {"resident_bytes": 400, "spilled_bytes": 400}
+    assert len(os.listdir(store.spill_dir)) == 1
+
+    reloaded = store.get(second)
+    assert np.array_equal(reloaded, np.full((20, 20), 7, dtype=np.uint8))
+    assert store.get(third) == b"c" * 400
+    assert store.memory_usage()['resident_bytes'] <= store.memory_budget_bytes
+
+def test_oversized_artifact_spills_without_evicting_others(store):
+    small = store.put("sesi-a", b"a" * 400)
+
+    big = store.put("sesi-b", b"x" * 5000)
+
+    assert store.session_memory_usage("sesi-a") == {"resident_bytes": 400, "spilled_bytes": 0}
+    assert store.session_memory_usage("sesi-b") == {"resident_bytes": 0, "spilled_bytes": 5000}
+    assert store.get(big) == b"x" * 5000
+    assert store.memory_usage()['resident_bytes'] == 400
+    assert store.get(small) == b"a" * 400
+
+def test_release_session_removes_memory_and_spill_files(store):
+    store.put("sesi-a", b"a" * 600)
+    store.put("sesi-a", b"b" * 600)
+    kept = store.put("sesi-b", b"c" * 100)
+
+    store.release_session("sesi-a")
+
+    assert store.memory_usage()['sessions'] == {"sesi-b": {"resident_bytes": 100, "spilled_bytes": 0}}
+    assert os.listdir(store.spill_dir) == []
+    assert store.get(kept) == b"c" * 100
+
+def test_purge_stale_drops_idle_artifacts(store):
+    handle = store.put("sesi-a", b"a" * 100)
+
+    assert store.purge_stale(max_idle_seconds=3600) == 0
+    assert store.purge_stale(max_idle_seconds=-1) == 1
+    assert store.get(handle) is None
+
+def test_oversized_artifact_stays_resident_when_disk_write_fails(store, monkeypatch):
+    small = store.put("sesi-a", b"a" * 400)
+
+    def failing_write(path, kind, value):
+        raise OSError("No space left on device")
+    monkeypatch.setattr(store, "_write_to_disk", failing_write)
+
+    big = store.put("sesi-b", b"x" * 5000)
+
+    assert store.get(big) == b"x" * 5000
+    assert store.session_memory_usage("sesi-b") == {"resident_bytes": 5000, "spilled_bytes": 0}
+    assert store.get(small) == b"a" * 400
+    assert os.listdir(store.spill_dir) == []
+
+    store.release(big)
+    assert store.memory_usage()['resident_bytes'] == 400
@@ -0,0 +1,86 @@
+import base64
+import csv
+import io
+import os
+import zipfile
+
+import pytest
+
+import history_export
+from conftest import insert_record
+
+@pytest.fixture(autouse=True)
+def export_dir(tmp_path, monkeypatch):
+    export_dir = str(tmp_path / "exports")
+    monkeypatch.setattr(history_export, "EXPORT_DIR", export_dir)
+    return export_dir
+
+def test_iter_detection_history_filters_by_date_range(temp_db):
+    insert_record("petani", "2026-01-01 08:00:00")
+    insert_record("petani", "2026-01-15 23:59:59")
+    insert_record("petani", "2026-02-01 00:00:00")
+    insert_record("agronom", "2026-01-10 12:00:00")
+
+    records = list(temp_db.iter_detection_history("petani", "2026-01-01", "2026-01-31", batch_size=1))
+
+    assert [r['timestamp'] for r in records] == ["2026-01-15 23:59:59", "2026-01-01 08:00:00"]
+    assert temp_db.count_detection_history("petani", "2026-01-01", "2026-01-31") == 2
+    assert temp_db.count_detection_history("petani") == 3
+
+def test_iter_detection_history_can_skip_images(temp_db):
+    insert_record("petani", "2026-01-01 08:00:00", image_path="aGFsbw==")
+
+    record = next(temp_db.iter_detection_history("petani", include_images=False))
+
+    assert "image_path" not in record
+
+def test_build_history_export_csv(temp_db):
+    insert_record("petani", "2026-01-01 08:00:00", disease_name="cmv", confidence=0.5)
+
+    export_path = history_export.build_history_export("petani", "csv")
+    with open(export_path, encoding="utf-8", newline="") as export_file:
+        rows = list(csv.reader(export_file))
+
+    assert rows[0] == history_export.CSV_HEADER
+    assert rows[1][1:] == ["2026-01-01 08:00:00", "cmv", "0.5000"]
+
+def test_build_history_export_zip_contains_images(temp_db):
+    image_bytes = b"\x89PNG fake image"
+    with_image = insert_record("petani", "2026-01-02 08:00:00", image_path=base64.b64encode(image_bytes).decode())
+    insert_record("petani", "2026-01-01 08:00:00")
+
+    export_path = history_export.build_history_export("petani", "zip")
+    with zipfile.ZipFile(export_path) as zf:
+        rows = list(csv.reader(io.StringIO(zf.read("history.csv").decode("utf-8"))))
+        assert zf.read(f"images/{with_image}.png") == image_bytes
+
+    assert rows[0] == history_export.ZIP_CSV_HEADER
+    assert [row[-1] for row in rows[1:]] == [f"images/{with_image}.png", ""]
+
+def test_history_export_is_served_from_static_dir(temp_db, export_dir):
+    insert_record("petani", "2026-01-01 08:00:00")
+
+    export_path = history_export.build_history_export("petani", "csv")
+
+    token = os.path.basename(os.path.dirname(export_path))
+    assert os.path.dirname(os.path.dirname(export_path)) == export_dir
+    assert history_export.history_export_url(export_path) == f"app/static/exports/{token}/riwayat_deteksi.csv"
+
+    history_export.remove_history_export(export_path)
+    assert os.listdir(export_dir) == []
+
+def test_oversized_history_export_is_discarded(temp_db, export_dir, monkeypatch):
+    insert_record("petani", "2026-01-01 08:00:00")
+    monkeypatch.setattr(history_export, "MAX_EXPORT_FILE_SIZE", 10)
+
+    assert history_export.build_history_export("petani", "csv") is None
+    assert os.listdir(export_dir) == []
+
+def test_purge_expired_exports(temp_db, export_dir):
+    insert_record("petani", "2026-01-01 08:00:00")
+    export_path = history_export.build_history_export("petani", "csv")
+
+    assert history_export.purge_expired_exports(max_age_seconds=3600) == 0
+    os.utime(os.path.dirname(export_path), (0, 0))
+    assert history_export.purge_expired_exports(max_age_seconds=3600) == 1
+    assert not os.path.exists(export_path)
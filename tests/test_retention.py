@@ -0,0 +1,70 @@
+import base64
+import os
+
+import maintenance
+from conftest import insert_record
+
+def _history_ids(db, username):
+    return [record['id'] for record in db.get_detection_history(username)]
+
+def test_delete_detection_records_only_deletes_own_records(temp_db):
+    own_first = insert_record("petani", "2026-01-01 08:00:00")
+    own_second = insert_record("petani", "2026-01-02 08:00:00")
+    other = insert_record("agronom", "2026-01-03 08:00:00")
+
+    deleted = temp_db.delete_detection_records("petani", [own_first, own_second, other])
+
+    assert deleted == 2
+    assert _history_ids(temp_db, "petani") == []
+    assert _history_ids(temp_db, "agronom") == [other]
+    assert temp_db.delete_detection_records("petani", []) == 0
+
+def test_retention_policy_defaults_and_update(temp_db):
+    assert temp_db.get_retention_policy("petani") == {"max_age_days": None, "max_records": None}
+
+    assert temp_db.set_retention_policy("petani", 30, 0)
+
+    assert temp_db.get_retention_policy("petani") == {"max_age_days": 30, "max_records": None}
+
+def test_purge_expired_records_by_count(temp_db):
+    ids = [insert_record("petani", f"2026-01-0{day} 08:00:00") for day in range(1, 6)]
+    other = insert_record("agronom", "2026-01-01 08:00:00")
+    temp_db.set_retention_policy("petani", max_records=2)
+
+    assert temp_db.purge_expired_records() == 3
+    assert _history_ids(temp_db, "petani") == [ids[4], ids[3]]
+    assert _history_ids(temp_db, "agronom") == [other]
+
+def test_purge_expired_records_by_age(temp_db):
+    insert_record("petani", "2000-01-01 08:00:00")
+    recent = insert_record("petani", temp_db._current_jakarta_time().strftime("%Y-%m-%d %H:%M:%S"))
+    temp_db.set_retention_policy("petani", max_age_days=7)
+
+    assert temp_db.purge_expired_records() == 1
+    assert _history_ids(temp_db, "petani") == [recent]
+
+def test_incremental_vacuum_reclaims_deleted_images(temp_db):
+    assert temp_db.enable_incremental_vacuum()
+    ids = [insert_record("petani", "2026-01-01 08:00:00", image_path=base64.b64encode(os.urandom(20000)).decode())
+           for _ in range(20)]
+    temp_db.delete_detection_records("petani", ids)
+    freelist_pages = temp_db.get_freelist_pages()
+    assert freelist_pages > 0
+
+    reclaimed = temp_db.incremental_vacuum(freelist_pages // 2)
+
+    assert reclaimed > 0
+    assert temp_db.get_freelist_pages() == freelist_pages - freelist_pages // 2
+
+def test_run_maintenance_reports_purged_records_and_bytes(temp_db):
+    temp_db.enable_incremental_vacuum()
+    for _ in range(10):
+        insert_record("petani", "2026-01-01 08:00:00", image_path=base64.b64encode(os.urandom(20000)).decode())
+    temp_db.set_retention_policy("petani", max_records=1)
+
+    report = maintenance.run_maintenance()
+
+    assert report['purged_records'] == 9
+    assert report['bytes_reclaimed'] > 0
+    assert temp_db.get_freelist_pages() == 0
+    assert maintenance.get_last_report() == report
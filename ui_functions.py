@@ -6,11 +6,15 @@ import uuid
 import pandas as pd
 from PIL import Image
 import numpy as np
-import time
+import html
 import database as db
+import history_export
+import maintenance
 import queue
 import base64 
 
+from artifact_store import artifact_store
+
 from model_load import load_yolo_model
 from webcam_processor import MelonDiseaseProcessor, RTC_CONFIGURATION
 from streamlit_webrtc import webrtc_streamer, WebRtcMode
@@ -116,44 +120,152 @@ def show_register_page():
         st.session_state.page = 'login'
         st.rerun()
 
+def _render_history_export_section():
+    with st.expander("📥 Ekspor Riwayat"):
+        col_start, col_end = st.columns(2)
+        with col_start:
+            start_date = st.date_input("Dari Tanggal", value=None, key="export_start_date")
+        with col_end:
+            end_date = st.date_input("Sampai Tanggal", value=None, key="export_end_date")
+
+        export_format_label = st.radio(
+            "Format Ekspor:",
+            ("CSV", "ZIP (CSV + Gambar)"),
+            horizontal=True,
+            key="export_format"
+        )
+        export_format = "zip" if export_format_label.startswith("ZIP") else "csv"
+
+        if start_date and end_date and start_date > end_date:
+            st.error("Tanggal awal tidak boleh melebihi tanggal akhir.")
+            return
+
+        start_date_str = start_date.isoformat() if start_date else None
+        end_date_str = end_date.isoformat() if end_date else None
+        exported_count = db.count_detection_history(st.session_state.username, start_date_str, end_date_str)
+        if exported_count == 0:
+            st.info("Tidak ada riwayat deteksi pada rentang tanggal tersebut.")
+            return
+
+        if st.button(f"Siapkan {exported_count} Catatan ({export_format.upper()})", key="prepare_export_btn"):
+            previous_export = st.session_state.get('history_export')
+            if previous_export:
+                history_export.remove_history_export(previous_export['path'])
+                st.session_state.history_export = None
+
+            with st.spinner('Menyiapkan file ekspor...'):
+                export_path = history_export.build_history_export(
+                    st.session_state.username, export_format, start_date_str, end_date_str
+                )
+            if export_path:
+                st.session_state.history_export = {
+                    "path": export_path,
+                    "file_name": f"riwayat_deteksi_{st.session_state.username}.{export_format}",
+                    "count": exported_count,
+                }
+            else:
+                st.error("Gagal membuat file ekspor atau ukurannya melebihi 200 MB. Persempit rentang tanggal lalu coba lagi.")
+
+        prepared_export = st.session_state.get('history_export')
+        if prepared_export and os.path.exists(prepared_export['path']):
+            st.markdown(
+                f'<a href="{html.escape(history_export.history_export_url(prepared_export["path"]))}" '
+                f'download="{html.escape(prepared_export["file_name"])}">📥 Unduh {prepared_export["count"]} Catatan '
+                f'({html.escape(prepared_export["file_name"])})</a>',
+                unsafe_allow_html=True
+            )
+            st.caption(f"Tautan unduhan berlaku {history_export.EXPORT_TTL_SECONDS // 60} menit.")
+
+def _render_retention_policy_section():
+    with st.expander("⚙️ Kebijakan Retensi Riwayat"):
+        policy = db.get_retention_policy(st.session_state.username)
+
+        with st.form("retention_policy_form"):
+            max_age_days = st.number_input(
+                "Umur Maksimum Catatan (hari)",
+                min_value=0,
+                value=policy['max_age_days'] or 0,
+                step=1,
+                help="Catatan yang lebih lama akan dihapus otomatis. Isi 0 untuk tanpa batas."
+            )
+            max_records = st.number_input(
+                "Jumlah Maksimum Catatan",
+                min_value=0,
+                value=policy['max_records'] or 0,
+                step=1,
+                help="Hanya catatan terbaru sebanyak ini yang disimpan. Isi 0 untuk tanpa batas."
+            )
+            save_button = st.form_submit_button("Simpan Kebijakan")
+
+        if save_button:
+            if db.set_retention_policy(st.session_state.username, int(max_age_days), int(max_records)):
+                maintenance.request_maintenance_run()
+                st.success("Kebijakan retensi disimpan. Catatan kedaluwarsa akan dihapus di latar belakang.")
+            else:
+                st.error("Gagal menyimpan kebijakan retensi.")
+
+        last_report = maintenance.get_last_report()
+        if last_report:
+            st.caption(
+                f"Pemeliharaan database terakhir (seluruh pengguna): {last_report['finished_at']} — "
+                f"{last_report['bytes_reclaimed'] / 1024:.1f} KB ruang dikosongkan."
+            )
+
 def show_history_page():
     st.title(f"Riwayat Deteksi")
 
     st.write("Berikut adalah riwayat deteksi penyakit yang telah Anda lakukan:")
+    _render_history_export_section()
+    _render_retention_policy_section()
     st.markdown("---")
 
+    if st.session_state.get('history_flash_message'):
+        st.success(st.session_state.history_flash_message)
+        st.session_state.history_flash_message = None
+
     history_records = db.get_detection_history(st.session_state.username)
 
     if history_records:
-        for record in history_records:
-            record_id = record['id']
-            st.write(f"**Waktu:** {record['timestamp']} | **Penyakit:** {record['disease_name']} | **Kepercayaan:** {record['confidence']:.2f}")
-
-            col_img, col_delete_btn = st.columns([2, 1]) 
-            with col_img:
-                image_base64_data = record['image_path'] 
-                
-                if image_base64_data: 
-                    try:
-                        decoded_img_bytes = base64.b64decode(image_base64_data)
-                        img = Image.open(io.BytesIO(decoded_img_bytes))
-                        st.image(img, caption="Gambar Hasil Deteksi", use_container_width=True)
-                    except Exception as e:
-                        st.warning(f"Gagal memuat gambar dari database: {e}")
-                        st.info("Tidak ada gambar deteksi tersedia (Error decoding).") 
-                else:
-                    st.info("Tidak ada gambar deteksi tersedia.") 
-
-            with col_delete_btn:
-                st.markdown("<div style='height: 40px;'></div>", unsafe_allow_html=True) 
-                if st.button("🗑️ Hapus", key=f"delete_{record_id}"):
-                    if db.delete_detection_record(record_id):
-                        st.success(f"Catatan riwayat berhasil dihapus.")
+        with st.form("bulk_delete_form"):
+            delete_button = st.form_submit_button("🗑️ Hapus yang Dipilih")
+            st.markdown("---")
+
+            selected_record_ids = []
+            for record in history_records:
+                record_id = record['id']
+                st.write(f"**Waktu:** {record['timestamp']} | **Penyakit:** {record['disease_name']} | **Kepercayaan:** {record['confidence']:.2f}")
+
+                col_img, col_select = st.columns([2, 1]) 
+                with col_img:
+                    image_base64_data = record['image_path'] 
+                    
+                    if image_base64_data: 
+                        try:
+                            decoded_img_bytes = base64.b64decode(image_base64_data)
+                            img = Image.open(io.BytesIO(decoded_img_bytes))
+                            st.image(img, caption="Gambar Hasil Deteksi", use_container_width=True)
+                        except Exception as e:
+                            st.warning(f"Gagal memuat gambar dari database: {e}")
+                            st.info("Tidak ada gambar deteksi tersedia (Error decoding).") 
                     else:
-                        st.error("Gagal menghapus catatan riwayat.")
-                    time.sleep(1.5) 
-                    st.rerun() 
-            st.markdown("---") 
+                        st.info("Tidak ada gambar deteksi tersedia.") 
+
+                with col_select:
+                    st.markdown("<div style='height: 40px;'></div>", unsafe_allow_html=True) 
+                    if st.checkbox("Pilih", key=f"select_{record_id}"):
+                        selected_record_ids.append(record_id)
+                st.markdown("---") 
+
+        if delete_button:
+            if not selected_record_ids:
+                st.warning("Pilih minimal satu catatan riwayat untuk dihapus.")
+            else:
+                deleted_count = db.delete_detection_records(st.session_state.username, selected_record_ids)
+                if deleted_count >= 0:
+                    st.session_state.history_flash_message = f"{deleted_count} catatan riwayat berhasil dihapus."
+                    st.rerun()
+                else:
+                    st.error("Gagal menghapus catatan riwayat.")
 
     else:
         st.info("Anda belum memiliki riwayat deteksi.")
@@ -200,11 +312,21 @@ def run_webcam_detection():
 
     st.markdown("---")
 
+def _store_session_artifact(handle_key: str, value):
+    old_handle = st.session_state.get(handle_key)
+    if old_handle:
+        artifact_store.release(old_handle)
+    st.session_state[handle_key] = artifact_store.put(st.session_state.artifact_session_id, value) if value is not None else None
+
+def _load_session_artifact(handle_key: str):
+    handle = st.session_state.get(handle_key)
+    return artifact_store.get(handle) if handle else None
+
 def _reset_upload_state():
-    st.session_state.uploaded_image_data = None
+    _store_session_artifact('uploaded_image_handle', None)
     st.session_state.uploaded_file_hash = None
     st.session_state.uploaded_file_name = None
-    st.session_state.processed_image_for_display_upload = None
+    _store_session_artifact('processed_image_handle', None)
     st.session_state.detection_results_summary_upload = "Tidak ada deteksi."
     st.session_state.detection_highest_confidence_upload = 0.0
     st.session_state.detected_class_names_upload = []
@@ -228,7 +350,7 @@ def _render_upload_section():
 
         if st.session_state.uploaded_file_hash != current_file_hash:
             _reset_upload_state()
-            st.session_state.uploaded_image_data = file_bytes
+            _store_session_artifact('uploaded_image_handle', file_bytes)
             st.session_state.uploaded_file_hash = current_file_hash
             st.session_state.uploaded_file_name = uploaded_file.name
             st.session_state.last_uploaded_file_id_processed = current_file_hash 
@@ -250,29 +372,36 @@ def _render_upload_section():
 
     st.markdown("---")
 
-    if st.session_state.uploaded_image_data is not None:
-        if (st.session_state.processed_image_for_display_upload is None or
+    uploaded_image_data = _load_session_artifact('uploaded_image_handle')
+    if uploaded_image_data is None and uploaded_file is not None:
+        uploaded_image_data = uploaded_file.getvalue()
+        _store_session_artifact('uploaded_image_handle', uploaded_image_data)
+
+    if uploaded_image_data is not None:
+        processed_image = _load_session_artifact('processed_image_handle')
+        if (processed_image is None or
             st.session_state.last_processed_upload_conf != confidence_threshold_upload):
 
             with st.spinner('Memproses deteksi penyakit...'):
                 processed_img, summary, highest_conf, detected_class_names, confidences_list_from_processing = \
-                    _process_image_with_model(st.session_state.uploaded_image_data, confidence_threshold_upload)
+                    _process_image_with_model(uploaded_image_data, confidence_threshold_upload)
 
                 if processed_img is None: 
                     st.error(summary) 
                 else:
-                    st.session_state.processed_image_for_display_upload = processed_img
+                    processed_image = processed_img
+                    _store_session_artifact('processed_image_handle', processed_img)
                     st.session_state.detection_results_summary_upload = summary
                     st.session_state.detection_highest_confidence_upload = highest_conf
                     st.session_state.detected_class_names_upload = detected_class_names
                     st.session_state.confidences_list_upload = confidences_list_from_processing
                     st.session_state.last_processed_upload_conf = confidence_threshold_upload
 
-        if st.session_state.username and st.session_state.processed_image_for_display_upload is not None:
+        if st.session_state.username and processed_image is not None:
             if (st.session_state.last_saved_upload_hash != st.session_state.uploaded_file_hash or
                 st.session_state.last_saved_upload_conf_for_hash != confidence_threshold_upload):
 
-                image_base64_for_db = _image_to_base64(st.session_state.processed_image_for_display_upload)
+                image_base64_for_db = _image_to_base64(processed_image)
 
                 if image_base64_for_db: 
                     confidence_to_save = st.session_state.detection_highest_confidence_upload 
@@ -291,17 +420,17 @@ def _render_upload_section():
         col1, col2 = st.columns(2, gap="small")
 
         with col1:
-            if st.session_state.uploaded_image_data is not None:
+            if uploaded_image_data is not None:
                 try:
-                    st.image(st.session_state.uploaded_image_data, caption='Gambar Asli', use_container_width=True)
+                    st.image(uploaded_image_data, caption='Gambar Asli', use_container_width=True)
                 except Exception as e:
                     st.error("Gagal menampilkan gambar asli.")
             else:
                 st.info("Gambar asli belum tersedia.")
         with col2:
-            if st.session_state.processed_image_for_display_upload is not None:
+            if processed_image is not None:
                 try:
-                    st.image(st.session_state.processed_image_for_display_upload, caption='Hasil Deteksi', use_container_width=True)
+                    st.image(processed_image, caption='Hasil Deteksi', use_container_width=True)
                 except Exception as e:
                     st.error("Gagal menampilkan gambar hasil deteksi.")
             else:
@@ -370,7 +499,7 @@ def show_about_app_page():
             * Hasil deteksi akan menunjukkan jenis penyakit yang teridentifikasi (jika ada) dan tingkat keyakinan (confidence) model terhadap deteksi tersebut.
         2.  **Riwayat Deteksi:**
             * Kunjungi halaman **"Riwayat Deteksi"** untuk melihat semua catatan deteksi yang pernah Anda lakukan. Setiap catatan mencakup tanggal, jenis penyakit, tingkat kepercayaan, dan gambar yang dianalisis.
-            * Anda juga bisa menghapus catatan riwayat yang tidak lagi diperlukan.
+            * Anda juga bisa memilih beberapa catatan riwayat sekaligus untuk dihapus, mengekspor riwayat ke CSV/ZIP, serta mengatur kebijakan retensi agar catatan lama terhapus otomatis.
         """
     )
     st.markdown("---")